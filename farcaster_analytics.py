@@ -0,0 +1,86 @@
+from tabulate import tabulate
+from query_farcaster_data import get_db_connection
+
+def get_top_liked_casts(limit=10):
+    """Get the most liked casts from the per-cast reaction rollup"""
+    conn = get_db_connection()
+    cur = conn.cursor()
+    
+    cur.execute("""
+        SELECT r.target_hash, r.target_fid, r.like_count, r.recast_count, c.text
+        FROM (
+            SELECT target_hash, target_fid, like_count, recast_count
+            FROM cast_reaction_counts
+            ORDER BY like_count DESC
+            LIMIT %s
+        ) r
+        LEFT JOIN LATERAL (
+            SELECT text FROM casts WHERE hash = r.target_hash LIMIT 1
+        ) c ON TRUE
+        ORDER BY r.like_count DESC
+    """, (limit,))
+    casts = cur.fetchall()
+    
+    cur.close()
+    conn.close()
+    
+    print(f"\nTop {limit} Liked Casts:")
+    print(tabulate(casts, headers=['Hash', 'Author FID', 'Likes', 'Recasts', 'Text'], tablefmt='grid'))
+    return casts
+
+def get_daily_activity(fid, days=30):
+    """Get daily casts, likes and recasts for a specific FID over the last `days` days"""
+    conn = get_db_connection()
+    cur = conn.cursor()
+    
+    cur.execute("""
+        SELECT day, cast_count, like_count, recast_count
+        FROM fid_daily_activity
+        WHERE fid = %s AND day >= CURRENT_DATE - %s
+        ORDER BY day
+    """, (fid, days))
+    activity = cur.fetchall()
+    
+    cur.close()
+    conn.close()
+    
+    print(f"\nDaily Activity for FID {fid} (last {days} days):")
+    print(tabulate(activity, headers=['Day', 'Casts', 'Likes', 'Recasts'], tablefmt='grid'))
+    return activity
+
+def get_most_active_casters(days=7, limit=10):
+    """Get the FIDs with the most casts over the last `days` days"""
+    conn = get_db_connection()
+    cur = conn.cursor()
+    
+    cur.execute("""
+        SELECT fid, SUM(cast_count) AS casts
+        FROM fid_daily_activity
+        WHERE day >= CURRENT_DATE - %s
+        GROUP BY fid
+        HAVING SUM(cast_count) > 0
+        ORDER BY casts DESC
+        LIMIT %s
+    """, (days, limit))
+    casters = cur.fetchall()
+    
+    cur.close()
+    conn.close()
+    
+    print(f"\nTop {limit} Most Active Casters (last {days} days):")
+    print(tabulate(casters, headers=['FID', 'Casts'], tablefmt='grid'))
+    return casters
+
+def main():
+    get_top_liked_casts()
+    casters = get_most_active_casters()
+    
+    if not casters:
+        print("No cast activity found in the rollups.")
+        return
+    
+    # Show the daily breakdown for the most active caster
+    get_daily_activity(casters[0][0])
+
+if __name__ == "__main__":
+    main()
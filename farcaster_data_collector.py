@@ -1,11 +1,11 @@
-import requests
 import psycopg2
-from psycopg2 import sql
+from psycopg2 import sql, errors
 import time
 import json
 from datetime import datetime
 import os
 from dotenv import load_dotenv
+from farcaster_rollups import lock_rollup_writers, refresh_rollups
 
 # Load environment variables
 load_dotenv()
@@ -19,27 +19,53 @@ DB_CONFIG = {
     'port': os.getenv('DB_PORT')
 }
 
+# Hub message timestamps count seconds from the Farcaster epoch (2021-01-01 UTC)
+FARCASTER_EPOCH = 1609459200
+
 # Pinata Hub API configuration
 PINATA_API_URL = "https://hub.pinata.cloud/v1"
 HEADERS = {
     #'Authorization': f"Bearer {os.getenv('PINATA_API_KEY')}"
 }
 
-def create_database_tables():
-    """Create necessary database tables if they don't exist"""
-    conn = psycopg2.connect(**DB_CONFIG)
-    cur = conn.cursor()
+def from_farcaster_timestamp(timestamp):
+    """Convert a hub message timestamp to a datetime"""
+    return datetime.fromtimestamp(FARCASTER_EPOCH + timestamp)
+
+class HubRequestError(Exception):
+    """A hub request failed before returning a usable response"""
+
+def hub_get(url, params):
+    """Send a GET request to the hub.
+
+    requests is imported here rather than at the top of the module: it
+    takes ~115ms to import, over a tenth of the startup budget, and
+    start_collector() never talks to the hub while the FID cache is fresh.
+    Transport errors are re-raised as HubRequestError so callers never
+    need the requests module themselves.
+    """
+    import requests
     
-    # Create tables
-    tables = {
-        'fids': """
+    try:
+        return requests.get(url, headers=HEADERS, params=params)
+    except requests.exceptions.RequestException as e:
+        raise HubRequestError(str(e)) from e
+
+# How long an enumerated FID list stays valid before the hub is asked again
+FID_CACHE_TTL_SECONDS = int(os.getenv('FID_CACHE_TTL_SECONDS', 24 * 60 * 60))
+
+# Schema migrations, applied in order. Each entry is (version, statements).
+# Never edit an applied migration: append a new version instead.
+MIGRATIONS = [
+    (1, [
+        """
             CREATE TABLE IF NOT EXISTS fids (
                 fid INTEGER PRIMARY KEY,
                 created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
                 updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
             )
         """,
-        'casts': """
+        """
             CREATE TABLE IF NOT EXISTS casts (
                 id SERIAL PRIMARY KEY,
                 fid INTEGER REFERENCES fids(fid),
@@ -54,7 +80,7 @@ def create_database_tables():
                 UNIQUE(fid, hash)
             )
         """,
-        'reactions': """
+        """
             CREATE TABLE IF NOT EXISTS reactions (
                 id SERIAL PRIMARY KEY,
                 fid INTEGER REFERENCES fids(fid),
@@ -68,7 +94,7 @@ def create_database_tables():
                 UNIQUE(fid, target_hash, type)
             )
         """,
-        'verifications': """
+        """
             CREATE TABLE IF NOT EXISTS verifications (
                 id SERIAL PRIMARY KEY,
                 fid INTEGER REFERENCES fids(fid),
@@ -80,7 +106,7 @@ def create_database_tables():
                 UNIQUE(fid, address)
             )
         """,
-        'links': """
+        """
             CREATE TABLE IF NOT EXISTS links (
                 id SERIAL PRIMARY KEY,
                 fid INTEGER REFERENCES fids(fid),
@@ -93,7 +119,7 @@ def create_database_tables():
                 UNIQUE(fid, target_fid, type)
             )
         """,
-        'user_data': """
+        """
             CREATE TABLE IF NOT EXISTS user_data (
                 id SERIAL PRIMARY KEY,
                 fid INTEGER REFERENCES fids(fid),
@@ -106,18 +132,206 @@ def create_database_tables():
                 UNIQUE(fid, type)
             )
         """
-    }
+    ]),
+    (2, [
+        """
+            CREATE TABLE IF NOT EXISTS fid_cache (
+                id INTEGER PRIMARY KEY CHECK (id = 1),
+                fids INTEGER[] NOT NULL,
+                fetched_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        """
+    ]),
+    (3, [
+        # Rollups maintained by farcaster_rollups.refresh_rollups
+        """
+            CREATE TABLE IF NOT EXISTS cast_reaction_counts (
+                target_hash TEXT PRIMARY KEY,
+                target_fid INTEGER,
+                like_count INTEGER NOT NULL DEFAULT 0,
+                recast_count INTEGER NOT NULL DEFAULT 0,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        """,
+        "CREATE INDEX IF NOT EXISTS cast_reaction_counts_like_count_idx ON cast_reaction_counts (like_count DESC)",
+        "CREATE INDEX IF NOT EXISTS cast_reaction_counts_recast_count_idx ON cast_reaction_counts (recast_count DESC)",
+        """
+            CREATE TABLE IF NOT EXISTS fid_daily_activity (
+                fid INTEGER,
+                day DATE,
+                cast_count INTEGER NOT NULL DEFAULT 0,
+                like_count INTEGER NOT NULL DEFAULT 0,
+                recast_count INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (fid, day)
+            )
+        """,
+        "CREATE INDEX IF NOT EXISTS fid_daily_activity_day_idx ON fid_daily_activity (day)",
+        """
+            CREATE TABLE IF NOT EXISTS rollup_watermarks (
+                name TEXT PRIMARY KEY,
+                last_id INTEGER NOT NULL DEFAULT 0,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        """,
+        "INSERT INTO rollup_watermarks (name) VALUES ('casts'), ('reactions') ON CONFLICT (name) DO NOTHING",
+        # Lets leaderboards look up cast text by hash alone
+        "CREATE INDEX IF NOT EXISTS casts_hash_idx ON casts (hash)",
+    ]),
+    (4, [
+        # Timestamps used to be stored as Unix time, landing in the 1970s;
+        # shift them by the Farcaster epoch and rebuild the rollups from scratch
+        "UPDATE casts SET timestamp = timestamp + INTERVAL '1609459200 seconds' WHERE timestamp < '2021-01-01'",
+        "UPDATE reactions SET timestamp = timestamp + INTERVAL '1609459200 seconds' WHERE timestamp < '2021-01-01'",
+        "UPDATE verifications SET timestamp = timestamp + INTERVAL '1609459200 seconds' WHERE timestamp < '2021-01-01'",
+        "UPDATE links SET timestamp = timestamp + INTERVAL '1609459200 seconds' WHERE timestamp < '2021-01-01'",
+        "UPDATE user_data SET timestamp = timestamp + INTERVAL '1609459200 seconds' WHERE timestamp < '2021-01-01'",
+        "TRUNCATE cast_reaction_counts, fid_daily_activity",
+        "UPDATE rollup_watermarks SET last_id = 0, updated_at = CURRENT_TIMESTAMP",
+    ]),
+]
+
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+# Key for the transaction-scoped advisory lock serializing schema migrations;
+# distinct from farcaster_rollups.ROLLUP_LOCK_KEY
+MIGRATION_LOCK_KEY = 4207310290
+
+def get_schema_version(cur):
+    """Return the applied schema version, or 0 if no migrations have run"""
+    try:
+        cur.execute("SELECT MAX(version) FROM schema_migrations")
+    except errors.UndefinedTable:
+        cur.connection.rollback()
+        return 0
+    version = cur.fetchone()[0]
+    return version or 0
+
+def create_database_tables(conn):
+    """Bring the schema up to SCHEMA_VERSION.
+
+    On an up-to-date database this is a single version check; the CREATE
+    statements only run for migrations that have not been applied yet.
+    Migrations run under an advisory lock, so concurrent starts apply each
+    one exactly once.
+    """
+    cur = conn.cursor()
+    
+    if get_schema_version(cur) >= SCHEMA_VERSION:
+        conn.commit()
+        cur.close()
+        return
     
-    for table_name, create_query in tables.items():
-        cur.execute(create_query)
+    # Another process may have migrated while we waited, so read the version again
+    cur.execute("SELECT pg_advisory_xact_lock(%s)", (MIGRATION_LOCK_KEY,))
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+            version INTEGER PRIMARY KEY,
+            applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    cur.execute("SELECT MAX(version) FROM schema_migrations")
+    current_version = cur.fetchone()[0] or 0
+    if current_version >= SCHEMA_VERSION:
+        conn.commit()
+        cur.close()
+        return
+    
+    print(f"Migrating schema from version {current_version} to {SCHEMA_VERSION}...")
+    for version, statements in MIGRATIONS:
+        if version <= current_version:
+            continue
+        for statement in statements:
+            cur.execute(statement)
+        cur.execute(
+            "INSERT INTO schema_migrations (version) VALUES (%s) ON CONFLICT (version) DO NOTHING",
+            (version,)
+        )
     
     conn.commit()
     cur.close()
-    conn.close()
+
+def load_cached_fids(conn):
+    """Return (fids, fresh) from the cache, or (None, False) if nothing is cached.
+
+    fresh is True while the entry is younger than FID_CACHE_TTL_SECONDS.
+    """
+    cur = conn.cursor()
+    cur.execute("""
+        SELECT fids, fetched_at > CURRENT_TIMESTAMP - make_interval(secs => %s)
+        FROM fid_cache
+        WHERE id = 1
+    """, (FID_CACHE_TTL_SECONDS,))
+    row = cur.fetchone()
+    conn.commit()
+    cur.close()
+    return (row[0], row[1]) if row else (None, False)
+
+def store_cached_fids(conn, fids):
+    """Replace the cached FID list"""
+    cur = conn.cursor()
+    cur.execute("""
+        INSERT INTO fid_cache (id, fids, fetched_at)
+        VALUES (1, %s, CURRENT_TIMESTAMP)
+        ON CONFLICT (id) DO UPDATE
+        SET fids = EXCLUDED.fids, fetched_at = EXCLUDED.fetched_at
+    """, (list(fids),))
+    conn.commit()
+    cur.close()
+
+def get_fids(conn):
+    """Return FIDs to process, enumerating them from the hub only when the cache is stale"""
+    cached_fids, fresh = load_cached_fids(conn)
+    if fresh:
+        print(f"Using {len(cached_fids)} cached FIDs")
+        return cached_fids
+    
+    print("FID cache is empty or stale, fetching all FIDs...")
+    fids, complete = fetch_all_fids()
+    # Only cache a clean enumeration, so a partial list is retried on the next start
+    if complete and fids:
+        store_cached_fids(conn, fids)
+        return fids
+    
+    if cached_fids is not None:
+        print(f"FID enumeration was incomplete, falling back to {len(cached_fids)} stale cached FIDs")
+        return cached_fids
+    return fids
+
+def register_fids(conn, fids):
+    """Record every FID to be processed in a single committed write"""
+    cur = conn.cursor()
+    cur.execute("""
+        INSERT INTO fids (fid)
+        SELECT unnest(%s::INTEGER[])
+        ON CONFLICT (fid) DO NOTHING
+    """, (list(fids),))
+    conn.commit()
+    cur.close()
+
+def start_collector():
+    """Bootstrap the schema, load FIDs and register them; returns the FID list.
+
+    This is everything main() does before fetching per-FID data, ending in
+    the collector's first committed write. With a fresh FID cache it makes
+    no network requests.
+    """
+    conn = psycopg2.connect(**DB_CONFIG)
+    try:
+        create_database_tables(conn)
+        fids = get_fids(conn)
+        register_fids(conn, fids)
+    finally:
+        conn.close()
+    return fids
 
 def fetch_all_fids():
-    """Fetch first 100 FIDs using pagination from both shards"""
+    """Fetch first 100 FIDs using pagination from both shards.
+
+    Returns (fids, complete); complete is False if any shard failed partway,
+    in which case fids may be short.
+    """
     all_fids = []
+    complete = True
     shard_ids = [1, 2]  # List of shard IDs to fetch from
     
     for shard_id in shard_ids:
@@ -133,8 +347,9 @@ def fetch_all_fids():
         while len(all_fids) < 100:  # Continue until we have 100 FIDs
             try:
                 url = f"{PINATA_API_URL}/fids"
-                response = requests.get(url, headers=HEADERS, params=params)
-                response.raise_for_status()
+                response = hub_get(url, params)
+                if response.status_code != 200:
+                    raise HubRequestError(f"{response.status_code} {response.text}")
                 
                 data = response.json()
                 new_fids = data.get('fids', [])
@@ -156,95 +371,133 @@ def fetch_all_fids():
                     
                 params['pageToken'] = next_page_token
                 
-            except requests.exceptions.RequestException as e:
+            except HubRequestError as e:
                 print(f"Error fetching FIDs from shard {shard_id}: {str(e)}")
+                complete = False
                 break
             except Exception as e:
                 print(f"Unexpected error while fetching FIDs from shard {shard_id}: {str(e)}")
+                complete = False
                 break
     
     print(f"Total FIDs collected: {len(all_fids)}")
-    return all_fids
+    return all_fids, complete
 
 def fetch_and_store_farcaster_data(fid):
-    """Fetch and store all Farcaster data for a given FID"""
+    """Fetch and store all Farcaster data for a given FID.
+
+    Everything is fetched from the hub first, so the rollup writer lock is
+    only held from the first insert through commit, never across network I/O.
+    """
+    # Fetch casts, reactions, verifications, links and user data
+    casts = fetch_casts(fid)
+    reactions = fetch_reactions(fid)
+    verifications = fetch_verifications(fid)
+    links = fetch_links(fid)
+    user_data = fetch_user_data(fid)
+    
     conn = psycopg2.connect(**DB_CONFIG)
     cur = conn.cursor()
     
+    # Serialize with other writers so the rollup watermarks never skip rows
+    lock_rollup_writers(cur)
+    
     # Store FID
     cur.execute("INSERT INTO fids (fid) VALUES (%s) ON CONFLICT (fid) DO NOTHING", (fid,))
     
-    # Fetch and store casts
-    fetch_and_store_casts(cur, fid)
+    store_casts(cur, fid, casts)
+    store_reactions(cur, fid, reactions)
+    store_verifications(cur, fid, verifications)
+    store_links(cur, fid, links)
+    store_user_data(cur, fid, user_data)
     
-    # Fetch and store reactions
-    fetch_and_store_reactions(cur, fid)
-    
-    # Fetch and store verifications
-    fetch_and_store_verifications(cur, fid)
-    
-    # Fetch and store links
-    fetch_and_store_links(cur, fid)
-    
-    # Fetch and store user data
-    fetch_and_store_user_data(cur, fid)
+    # Fold the new rows into the analytics rollups in the same transaction
+    refresh_rollups(cur)
     
     conn.commit()
     cur.close()
     conn.close()
 
-def fetch_and_store_casts(cur, fid):
-    """Fetch and store casts for a given FID"""
+def fetch_messages(url, params, label):
+    """Fetch every page of messages from a paginated hub endpoint"""
+    messages = []
+    params = dict(params)
+    
+    while True:
+        response = hub_get(url, params)
+        print(f"Response status code: {response.status_code}")
+        
+        if response.status_code == 200:
+            data = response.json()
+            page = data.get('messages', [])
+            print(f"Found {len(page)} {label} in this page")
+            messages.extend(page)
+            
+            # Check for next page
+            next_page_token = data.get('nextPageToken')
+            if not next_page_token:
+                break
+                
+            params['pageToken'] = next_page_token
+        else:
+            print(f"Error response: {response.text}")
+            break
+    
+    return messages
+
+def fetch_casts(fid):
+    """Fetch casts for a given FID"""
     url = f"{PINATA_API_URL}/castsByFid"
     params = {'fid': fid}
     
     print(f"\nFetching casts for FID {fid}...")
-    response = requests.get(url, headers=HEADERS, params=params)
+    response = hub_get(url, params)
     print(f"Response status code: {response.status_code}")
     
-    if response.status_code == 200:
-        data = response.json()
-        #print(data)
-        casts = data.get('messages', [])
-        print(f"Found {len(casts)} casts")
-        
-        for cast in casts:
-            try:
-                #print(cast.get('data'))
-                cur.execute("""
-                    INSERT INTO casts (fid, hash, parent_hash, author_fid, text, timestamp, created_at, updated_at, is_current)
-                    VALUES (%s, %s, %s, %s, %s, %s, CURRENT_TIMESTAMP, CURRENT_TIMESTAMP, TRUE)
-                    ON CONFLICT (fid, hash) DO UPDATE 
-                    SET 
-                        parent_hash = EXCLUDED.parent_hash,
-                        author_fid = EXCLUDED.author_fid,
-                        text = EXCLUDED.text,
-                        timestamp = EXCLUDED.timestamp,
-                        updated_at = CURRENT_TIMESTAMP,
-                        is_current = TRUE
-                    WHERE 
-                        casts.parent_hash IS DISTINCT FROM EXCLUDED.parent_hash OR
-                        casts.author_fid IS DISTINCT FROM EXCLUDED.author_fid OR
-                        casts.text IS DISTINCT FROM EXCLUDED.text OR
-                        casts.timestamp IS DISTINCT FROM EXCLUDED.timestamp
-                """, (
-                    fid,
-                    cast.get('data', {}).get('hash'),
-                    cast.get('data', {}).get('castAddBody', {}).get('parentCastId', {}).get('hash') if cast.get('data', {}).get('castAddBody', {}).get('parentCastId') else None,
-                    cast.get('data', {}).get('fid'),
-                    cast.get('data', {}).get('castAddBody', {}).get('text', ''),
-                    datetime.fromtimestamp(cast.get('data', {}).get('timestamp', 0))
-                ))
-            except Exception as e:
-                print(f"Error inserting cast: {cast} {str(e)}")
-    else:
+    if response.status_code != 200:
         print(f"Error response: {response.text}")
+        return []
+    
+    casts = response.json().get('messages', [])
+    print(f"Found {len(casts)} casts")
+    return casts
 
-def fetch_and_store_reactions(cur, fid):
-    """Fetch and store reactions for a given FID"""
+def store_casts(cur, fid, casts):
+    """Store fetched casts for a given FID"""
+    for cast in casts:
+        try:
+            cur.execute("""
+                INSERT INTO casts (fid, hash, parent_hash, author_fid, text, timestamp, created_at, updated_at, is_current)
+                VALUES (%s, %s, %s, %s, %s, %s, CURRENT_TIMESTAMP, CURRENT_TIMESTAMP, TRUE)
+                ON CONFLICT (fid, hash) DO UPDATE 
+                SET 
+                    parent_hash = EXCLUDED.parent_hash,
+                    author_fid = EXCLUDED.author_fid,
+                    text = EXCLUDED.text,
+                    timestamp = EXCLUDED.timestamp,
+                    updated_at = CURRENT_TIMESTAMP,
+                    is_current = TRUE
+                WHERE 
+                    casts.parent_hash IS DISTINCT FROM EXCLUDED.parent_hash OR
+                    casts.author_fid IS DISTINCT FROM EXCLUDED.author_fid OR
+                    casts.text IS DISTINCT FROM EXCLUDED.text OR
+                    casts.timestamp IS DISTINCT FROM EXCLUDED.timestamp
+            """, (
+                fid,
+                cast.get('data', {}).get('hash'),
+                cast.get('data', {}).get('castAddBody', {}).get('parentCastId', {}).get('hash') if cast.get('data', {}).get('castAddBody', {}).get('parentCastId') else None,
+                cast.get('data', {}).get('fid'),
+                cast.get('data', {}).get('castAddBody', {}).get('text', ''),
+                from_farcaster_timestamp(cast.get('data', {}).get('timestamp', 0))
+            ))
+        except Exception as e:
+            print(f"Error inserting cast: {cast} {str(e)}")
+
+def fetch_reactions(fid):
+    """Fetch reactions for a given FID"""
     url = f"{PINATA_API_URL}/reactionsByFid"
     reaction_types = ['Like', 'Recast','None']
-    total_reactions = 0
+    reactions = []
     
     for reaction_type in reaction_types:
         print(f"\nFetching {reaction_type} for FID {fid}...")
@@ -253,51 +506,35 @@ def fetch_and_store_reactions(cur, fid):
             'reaction_type': reaction_type,
             'pageSize': 100000
         }
-        
-        while True:
-            response = requests.get(url, headers=HEADERS, params=params)
-            print(f"Response status code: {response.status_code}")
-            
-            if response.status_code == 200:
-                data = response.json()
-                reactions = data.get('messages', [])
-                print(f"Found {len(reactions)} {reaction_type} in this page")
-                total_reactions += len(reactions)
-                
-                for reaction in reactions:
-                    try:
-                        reaction_data = reaction.get('data', {})
-                        reaction_body = reaction_data.get('reactionBody', {})
-                        target_cast = reaction_body.get('targetCastId', {})
-                        
-                        cur.execute("""
-                            INSERT INTO reactions (fid, target_fid, target_hash, type, timestamp)
-                            VALUES (%s, %s, %s, %s, %s)
-                            ON CONFLICT DO NOTHING
-                        """, (
-                            fid,
-                            target_cast.get('fid'),
-                            target_cast.get('hash'),
-                            reaction_body.get('type'),
-                            datetime.fromtimestamp(reaction_data.get('timestamp', 0))
-                        ))
-                    except Exception as e:
-                        print(f"Error inserting reaction: {str(e)}")
-                
-                # Check for next page
-                next_page_token = data.get('nextPageToken')
-                if not next_page_token:
-                    break
-                    
-                params['pageToken'] = next_page_token
-            else:
-                print(f"Error response: {response.text}")
-                break
+        reactions.extend(fetch_messages(url, params, reaction_type))
     
-    print(f"Total reactions processed: {total_reactions}")
+    print(f"Total reactions fetched: {len(reactions)}")
+    return reactions
+
+def store_reactions(cur, fid, reactions):
+    """Store fetched reactions for a given FID"""
+    for reaction in reactions:
+        try:
+            reaction_data = reaction.get('data', {})
+            reaction_body = reaction_data.get('reactionBody', {})
+            target_cast = reaction_body.get('targetCastId', {})
+            
+            cur.execute("""
+                INSERT INTO reactions (fid, target_fid, target_hash, type, timestamp)
+                VALUES (%s, %s, %s, %s, %s)
+                ON CONFLICT DO NOTHING
+            """, (
+                fid,
+                target_cast.get('fid'),
+                target_cast.get('hash'),
+                reaction_body.get('type'),
+                from_farcaster_timestamp(reaction_data.get('timestamp', 0))
+            ))
+        except Exception as e:
+            print(f"Error inserting reaction: {str(e)}")
 
-def fetch_and_store_verifications(cur, fid):
-    """Fetch and store verifications for a given FID"""
+def fetch_verifications(fid):
+    """Fetch verifications for a given FID"""
     url = f"{PINATA_API_URL}/verificationsByFid"
     params = {
         'fid': fid,
@@ -305,49 +542,31 @@ def fetch_and_store_verifications(cur, fid):
     }
     
     print(f"\nFetching verifications for FID {fid}...")
-    total_verifications = 0
-    
-    while True:
-        response = requests.get(url, headers=HEADERS, params=params)
-        print(f"Response status code: {response.status_code}")
-        
-        if response.status_code == 200:
-            data = response.json()
-            verifications = data.get('messages', [])
-            print(f"Found {len(verifications)} verifications in this page")
-            total_verifications += len(verifications)
-            
-            for verification in verifications:
-                try:
-                    verification_data = verification.get('data', {})
-                    verification_body = verification_data.get('verificationAddEthAddressBody', {})
-                    
-                    cur.execute("""
-                        INSERT INTO verifications (fid, address, timestamp, created_at)
-                        VALUES (%s, %s, %s, CURRENT_TIMESTAMP)
-                        ON CONFLICT DO NOTHING
-                    """, (
-                        fid,
-                        verification_body.get('address'),
-                        datetime.fromtimestamp(verification_data.get('timestamp', 0))
-                    ))
-                except Exception as e:
-                    print(f"Error inserting verification: {str(e)}")
+    verifications = fetch_messages(url, params, 'verifications')
+    print(f"Total verifications fetched: {len(verifications)}")
+    return verifications
+
+def store_verifications(cur, fid, verifications):
+    """Store fetched verifications for a given FID"""
+    for verification in verifications:
+        try:
+            verification_data = verification.get('data', {})
+            verification_body = verification_data.get('verificationAddEthAddressBody', {})
             
-            # Check for next page
-            next_page_token = data.get('nextPageToken')
-            if not next_page_token:
-                break
-                
-            params['pageToken'] = next_page_token
-        else:
-            print(f"Error response: {response.text}")
-            break
-    
-    print(f"Total verifications processed: {total_verifications}")
+            cur.execute("""
+                INSERT INTO verifications (fid, address, timestamp, created_at)
+                VALUES (%s, %s, %s, CURRENT_TIMESTAMP)
+                ON CONFLICT DO NOTHING
+            """, (
+                fid,
+                verification_body.get('address'),
+                from_farcaster_timestamp(verification_data.get('timestamp', 0))
+            ))
+        except Exception as e:
+            print(f"Error inserting verification: {str(e)}")
 
-def fetch_and_store_links(cur, fid):
-    """Fetch and store links for a given FID"""
+def fetch_links(fid):
+    """Fetch links for a given FID"""
     url = f"{PINATA_API_URL}/linksByFid"
     params = {
         'fid': fid,
@@ -356,50 +575,32 @@ def fetch_and_store_links(cur, fid):
     }
     
     print(f"\nFetching links for FID {fid}...")
-    total_links = 0
-    
-    while True:
-        response = requests.get(url, headers=HEADERS, params=params)
-        print(f"Response status code: {response.status_code}")
-        
-        if response.status_code == 200:
-            data = response.json()
-            links = data.get('messages', [])
-            print(f"Found {len(links)} links in this page")
-            total_links += len(links)
-            
-            for link in links:
-                try:
-                    link_data = link.get('data', {})
-                    link_body = link_data.get('linkBody', {})
-                    
-                    cur.execute("""
-                        INSERT INTO links (fid, target_fid, type, timestamp, created_at)
-                        VALUES (%s, %s, %s, %s, CURRENT_TIMESTAMP)
-                        ON CONFLICT DO NOTHING
-                    """, (
-                        fid,
-                        link_body.get('targetFid'),
-                        link_body.get('type'),
-                        datetime.fromtimestamp(link_data.get('timestamp', 0))
-                    ))
-                except Exception as e:
-                    print(f"Error inserting link: {str(e)}")
+    links = fetch_messages(url, params, 'links')
+    print(f"Total links fetched: {len(links)}")
+    return links
+
+def store_links(cur, fid, links):
+    """Store fetched links for a given FID"""
+    for link in links:
+        try:
+            link_data = link.get('data', {})
+            link_body = link_data.get('linkBody', {})
             
-            # Check for next page
-            next_page_token = data.get('nextPageToken')
-            if not next_page_token:
-                break
-                
-            params['pageToken'] = next_page_token
-        else:
-            print(f"Error response: {response.text}")
-            break
-    
-    print(f"Total links processed: {total_links}")
+            cur.execute("""
+                INSERT INTO links (fid, target_fid, type, timestamp, created_at)
+                VALUES (%s, %s, %s, %s, CURRENT_TIMESTAMP)
+                ON CONFLICT DO NOTHING
+            """, (
+                fid,
+                link_body.get('targetFid'),
+                link_body.get('type'),
+                from_farcaster_timestamp(link_data.get('timestamp', 0))
+            ))
+        except Exception as e:
+            print(f"Error inserting link: {str(e)}")
 
-def fetch_and_store_user_data(cur, fid):
-    """Fetch and store user data for a given FID"""
+def fetch_user_data(fid):
+    """Fetch user data for a given FID"""
     url = f"{PINATA_API_URL}/userDataByFid"
     user_data_types = [
         'USER_DATA_TYPE_PFP',
@@ -408,7 +609,7 @@ def fetch_and_store_user_data(cur, fid):
         'USER_DATA_TYPE_URL',
         'USER_DATA_TYPE_USERNAME'
     ]
-    total_user_data = 0
+    user_data = []
     
     for data_type in user_data_types:
         print(f"\nFetching {data_type} for FID {fid}...")
@@ -417,53 +618,32 @@ def fetch_and_store_user_data(cur, fid):
             'user_data_type': data_type,
             'pageSize': 100000
         }
-        
-        while True:
-            response = requests.get(url, headers=HEADERS, params=params)
-            print(f"Response status code: {response.status_code}")
-            
-            if response.status_code == 200:
-                data = response.json()
-                user_data = data.get('messages', [])
-                print(f"Found {len(user_data)} {data_type} entries in this page")
-                total_user_data += len(user_data)
-                
-                for entry in user_data:
-                    try:
-                        user_data_body = entry.get('data', {}).get('userDataBody', {})
-                        
-                        cur.execute("""
-                            INSERT INTO user_data (fid, type, value, timestamp, created_at)
-                            VALUES (%s, %s, %s, %s, CURRENT_TIMESTAMP)
-                            ON CONFLICT DO NOTHING
-                        """, (
-                            fid,
-                            user_data_body.get('type'),
-                            user_data_body.get('value'),
-                            datetime.fromtimestamp(entry.get('data', {}).get('timestamp', 0))
-                        ))
-                    except Exception as e:
-                        print(f"Error inserting user data: {str(e)}")
-                
-                # Check for next page
-                next_page_token = data.get('nextPageToken')
-                if not next_page_token:
-                    break
-                    
-                params['pageToken'] = next_page_token
-            else:
-                print(f"Error response: {response.text}")
-                break
+        user_data.extend(fetch_messages(url, params, f"{data_type} entries"))
     
-    print(f"Total user data entries processed: {total_user_data}")
+    print(f"Total user data entries fetched: {len(user_data)}")
+    return user_data
+
+def store_user_data(cur, fid, user_data):
+    """Store fetched user data for a given FID"""
+    for entry in user_data:
+        try:
+            user_data_body = entry.get('data', {}).get('userDataBody', {})
+            
+            cur.execute("""
+                INSERT INTO user_data (fid, type, value, timestamp, created_at)
+                VALUES (%s, %s, %s, %s, CURRENT_TIMESTAMP)
+                ON CONFLICT DO NOTHING
+            """, (
+                fid,
+                user_data_body.get('type'),
+                user_data_body.get('value'),
+                from_farcaster_timestamp(entry.get('data', {}).get('timestamp', 0))
+            ))
+        except Exception as e:
+            print(f"Error inserting user data: {str(e)}")
 
 def main():
-    # Create database tables
-    create_database_tables()
-    
-    # Fetch all FIDs
-    print("Fetching all FIDs...")
-    fids = fetch_all_fids()
+    fids = start_collector()
     print(f"Found {len(fids)} FIDs")
     
     # Process each FID
@@ -0,0 +1,96 @@
+# Reaction type values as returned by the hub in reactionBody.type
+LIKE_TYPE = 'REACTION_TYPE_LIKE'
+RECAST_TYPE = 'REACTION_TYPE_RECAST'
+
+# Key for the transaction-scoped advisory lock serializing writers of the
+# casts and reactions tables with the rollup refresh
+ROLLUP_LOCK_KEY = 4207310291
+
+def lock_rollup_writers(cur):
+    """Take the rollup writer lock until the current transaction ends.
+
+    Call this before the transaction's first insert into casts or reactions.
+    """
+    cur.execute("SELECT pg_advisory_xact_lock(%s)", (ROLLUP_LOCK_KEY,))
+
+def refresh_rollups(cur):
+    """Fold casts and reactions added since the last refresh into the rollup tables.
+    
+    Progress is tracked per source table in rollup_watermarks as the highest
+    row id already counted, so each refresh only scans new rows. The caller
+    owns the transaction: commit after this returns so the rollups and
+    watermarks move together.
+
+    Ids are assigned at insert time but only become visible at commit, so a
+    concurrent writer's uncommitted rows could fall below a watermark and be
+    skipped for good. Every transaction that inserts casts or reactions must
+    therefore hold lock_rollup_writers() from before its first insert.
+
+    Casts are only counted when first inserted. That is safe because a cast
+    hash covers its message data, timestamp included, so an existing
+    (fid, hash) row never moves to another day.
+    """
+    cur.execute("SELECT name, last_id FROM rollup_watermarks FOR UPDATE")
+    watermarks = dict(cur.fetchall())
+    
+    # Reactions -> per-cast counts and per-FID daily like/recast buckets
+    cur.execute("SELECT COALESCE(MAX(id), 0) FROM reactions")
+    high = cur.fetchone()[0]
+    low = watermarks.get('reactions', 0)
+    if high > low:
+        params = {'low': low, 'high': high, 'like': LIKE_TYPE, 'recast': RECAST_TYPE}
+        cur.execute("""
+            INSERT INTO cast_reaction_counts (target_hash, target_fid, like_count, recast_count)
+            SELECT
+                target_hash,
+                MAX(target_fid),
+                COUNT(*) FILTER (WHERE type = %(like)s),
+                COUNT(*) FILTER (WHERE type = %(recast)s)
+            FROM reactions
+            WHERE id > %(low)s AND id <= %(high)s AND target_hash IS NOT NULL
+            GROUP BY target_hash
+            ON CONFLICT (target_hash) DO UPDATE
+            SET
+                target_fid = COALESCE(cast_reaction_counts.target_fid, EXCLUDED.target_fid),
+                like_count = cast_reaction_counts.like_count + EXCLUDED.like_count,
+                recast_count = cast_reaction_counts.recast_count + EXCLUDED.recast_count,
+                updated_at = CURRENT_TIMESTAMP
+        """, params)
+        cur.execute("""
+            INSERT INTO fid_daily_activity (fid, day, like_count, recast_count)
+            SELECT
+                fid,
+                timestamp::date,
+                COUNT(*) FILTER (WHERE type = %(like)s),
+                COUNT(*) FILTER (WHERE type = %(recast)s)
+            FROM reactions
+            WHERE id > %(low)s AND id <= %(high)s
+            GROUP BY fid, timestamp::date
+            ON CONFLICT (fid, day) DO UPDATE
+            SET
+                like_count = fid_daily_activity.like_count + EXCLUDED.like_count,
+                recast_count = fid_daily_activity.recast_count + EXCLUDED.recast_count
+        """, params)
+        cur.execute("""
+            UPDATE rollup_watermarks SET last_id = %s, updated_at = CURRENT_TIMESTAMP
+            WHERE name = 'reactions'
+        """, (high,))
+    
+    # Casts -> per-FID daily cast buckets
+    cur.execute("SELECT COALESCE(MAX(id), 0) FROM casts")
+    high = cur.fetchone()[0]
+    low = watermarks.get('casts', 0)
+    if high > low:
+        cur.execute("""
+            INSERT INTO fid_daily_activity (fid, day, cast_count)
+            SELECT fid, timestamp::date, COUNT(*)
+            FROM casts
+            WHERE id > %s AND id <= %s
+            GROUP BY fid, timestamp::date
+            ON CONFLICT (fid, day) DO UPDATE
+            SET cast_count = fid_daily_activity.cast_count + EXCLUDED.cast_count
+        """, (low, high))
+        cur.execute("""
+            UPDATE rollup_watermarks SET last_id = %s, updated_at = CURRENT_TIMESTAMP
+            WHERE name = 'casts'
+        """, (high,))